@@ -1,17 +1,15 @@
 # bot.py
 import discord
-import json
 from discord.ext import commands
 import firebase_admin
 from firebase_admin import credentials
 import asyncio
-from utils.config import TOKEN, FIREBASE_CERTIFICATE
+from utils.config import TOKEN, load_firebase_config
+from utils.errors import handle_command_error
 
 # load env & firebase credentials
 if not firebase_admin._apps:
-    firebase_config_str = FIREBASE_CERTIFICATE.strip().replace("\n", "")
-    firebase_config = json.loads(firebase_config_str)
-    cred = credentials.Certificate(firebase_config)
+    cred = credentials.Certificate(load_firebase_config())
     firebase_admin.initialize_app(cred)
 
 # bot setup
@@ -25,26 +23,37 @@ async def load_extensions():
     await bot.load_extension("cogs.user_commands")
     await bot.load_extension("cogs.admin_commands")
 
+from utils.db import (load_admin_ids, flush_writes, refresh_admins_periodically,
+                      watch_admin_ids, ensure_guild_totals_seeded,
+                      ensure_bonusloot_slots_backfilled)
+from utils.logging import send_logs_periodically
+
 @bot.event
 async def setup_hook():
-    from utils.db import load_admin_ids
     await load_admin_ids()
+    # snapshot listener pushes admin changes live; the periodic refresh stays
+    # as a fallback in case the watch stream dies silently
+    watch_admin_ids()
+    # seed the loot counters before any command can create stats/guild via an
+    # Increment write, which would skip the one-time scan and undercount
+    await ensure_guild_totals_seeded()
+    # backfill the denormalized bonusloot slot arrays for pre-existing docs so
+    # slot-name findbonusloot queries see them; no-op after the first run
+    await ensure_bonusloot_slots_backfilled()
     await load_extensions()
-    from utils.logging import send_logs_periodically
+    asyncio.create_task(flush_writes())
+    asyncio.create_task(refresh_admins_periodically())
     asyncio.create_task(send_logs_periodically(bot))
 
 @bot.event
 async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        await ctx.send(f"{ctx.author.mention} That command does not exist. Please check your command and try again.")
-    elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send(f"{ctx.author.mention} Missing required argument. Please check your command and try again.")
-    elif isinstance(error, commands.BadArgument):
-        await ctx.send(f"{ctx.author.mention} One or more arguments are invalid. Please check your command and try again.")
-    elif isinstance(error, commands.CheckFailure):
-        await ctx.send(f"{ctx.author.mention} You do not have permission to use that command, or it cannot be used here.")
-    else:
-        print(f"Unhandled error: {error}")
-        await ctx.send(f"{ctx.author.mention} An error occurred while processing your command.")
+    await handle_command_error(ctx, error)
+
+# use uvloop's faster event loop where available (not supported on Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 bot.run(TOKEN)
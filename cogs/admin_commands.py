@@ -1,15 +1,73 @@
 # cogs/admin_commands.py
-from discord.ext import commands
 import asyncio
 
-from utils.db import (get_user, lock_gear_slot, unlock_gear_slot, add_loot,
-add_bonusloot, add_pity, set_pity, remove_gear_item, remove_loot, 
-remove_bonusloot, is_admin, ADMIN_IDS, get_db, update_gear_item)
+from discord.ext import commands
+
+from utils.db import (get_user, get_user_slot, unlock_gear_slot, assign_loot_entry,
+add_bonusloot, add_pity, set_pity, remove_gear_item, remove_loot,
+remove_bonusloot, is_admin, is_admin_id, user_ref, update_gear_item,
+invalidate_user, get_item_index, get_guild_totals, seed_guild_totals,
+adjust_guild_totals, iter_users, query_users_with_token, get_user_ids,
+invalidate_user_ids, invalidate_username, query_users_with_bonusloot_slot)
 
-from utils.helpers import canonical_loot_entry, resolve_member, split_message
-from utils.config import GEAR_SLOTS
+from utils.helpers import canonical_loot_entry, resolve_member, send_chunks, fetch_user_displays
+from utils.config import GEAR_SLOT_LOOKUP, GEAR_SLOTS_STR, GEAR_SLOT_PREFIXES
 from utils.logging import log_interaction, format_user
 
+# stop finditem scans once this many users matched; keeps output readable and
+# lets the collection stream terminate early on common search terms
+FINDITEM_MAX_RESULTS = 25
+
+def format_gear_match(slot, item_value, looted):
+    """Format a single gear-slot match with its lock status for finditem output."""
+    if looted:
+        return f"🔴 {slot}: ~~{item_value.strip()}~~"
+    return f"🟢 {slot}: {item_value.strip()}"
+
+def _gear_substring_matches(data, search_term):
+    """Return formatted gear matches whose item contains the lowercase term."""
+    # users with no gear at all skip both the precheck and the slot loop
+    gear = data.get("gear")
+    if not gear:
+        return []
+    # the precomputed lowercase view lets us skip non-matching users; joining
+    # with NUL gives one C-level substring scan instead of a per-slot loop
+    # (NUL never appears in item names, so no false matches across slots)
+    items_lower = data.get("items_lower")
+    if items_lower is not None and search_term not in "\x00".join(items_lower):
+        return []
+    matches = []
+    for slot, slot_data in gear.items():
+        # bail out of each slot as early as possible: most slots are empty
+        # or miss, so skip before doing any string normalization
+        item_value = slot_data.get("item")
+        if not item_value:
+            continue
+        if search_term not in item_value.strip().lower():
+            continue
+        matches.append(format_gear_match(slot, item_value, slot_data.get("looted")))
+    return matches
+
+# static admin help text, built once at import
+ADMIN_HELP_TEXT = (
+    "**Admin Commands:**\n"
+    "`!ezloot listusers` - List all registered users.\n"
+    "`!ezloot finditem <item>` - Find users with a specified item in their gear (substring matching) and display lock status.\n"
+    "`!ezloot findbonusloot <item>` - Find users with bonus loot entries containing a specified string.\n"
+    "`!ezloot assignloot <user_identifier> <slot> <optional_origin>` - Assign loot to a user for a specific gear slot (locks the slot).\n"
+    "`!ezloot assignbonusloot <user_identifier> <slot> <loot>` - Assign bonus loot to a user.\n"
+    "`!ezloot addpity <user_identifier>` - Increment the pity level for a user by 1.\n"
+    "`!ezloot setpity <user_identifier> <pity_level>` - Set the pity level for a user to a specified amount.\n"
+    "`!ezloot editgear <user_identifier> <slot> <new_item>` - Edit a user's gear slot.\n"
+    "`!ezloot unlock <user_identifier> <slot>` - Unlock a gear slot for a user.\n"
+    "`!ezloot removegear <user_identifier> <slot>` - Reset a gear slot for a user.\n"
+    "`!ezloot removeloot <user_identifier> <slot>` - Remove the loot entry for a specified slot from a user's record.\n"
+    "`!ezloot removebonusloot <user_identifier> <slot>` - Remove the bonus loot entry for a specified slot from a user's record.\n"
+    "`!ezloot removeuser <user_identifier>` - Remove a user from the database (non-admin users only).\n"
+    "`!ezloot guildtotal` - Show the total count of loot pieces awarded across all users.\n"
+    "`!ezloot admincommands` - Show this help message.\n"
+)
+
 class AdminCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -20,86 +78,134 @@ class AdminCommands(commands.Cog):
     @commands.command(name="listusers")
     async def list_users(self, ctx):
         """Admin: List all registered users."""
-        def fetch_users():
-            db = get_db()
-            return list(db.collection("users").stream())
-        docs = await asyncio.to_thread(fetch_users)
-        if not docs:
+        # prefix commands have no interaction deadline, but show a typing
+        # indicator right away while the collection scan runs
+        await ctx.typing()
+        user_ids = [int(uid) for uid in await get_user_ids()]
+        if not user_ids:
             await ctx.send("No users registered yet.")
             return
+        displays = await fetch_user_displays(self.bot, user_ids, guild=ctx.guild)
         message_lines = ["**Registered Users:**"]
-        for doc in docs:
-            user_id = doc.id
-            try:
-                user = await self.bot.fetch_user(int(doc.id))
-                message_lines.append(f"- {format_user(user)} [{user_id}]")
-            except Exception:
+        for user_id in user_ids:
+            display = displays.get(user_id)
+            if display is not None:
+                message_lines.append(f"- {display} [{user_id}]")
+            else:
                 message_lines.append(f"- Unknown User ({user_id})")
-        full_message = "\n".join(message_lines)
-        for chunk in split_message(full_message):
-            await ctx.send(chunk)
+        await send_chunks(ctx, "\n".join(message_lines))
 
     @commands.command(name="finditem")
     async def find_item(self, ctx, *, item: str):
-        def fetch_users():
-            db = get_db()
-            return list(db.collection("users").stream())
-        docs = await asyncio.to_thread(fetch_users)
-        results = []
+        await ctx.typing()
         search_term = item.strip().lower()
-        for doc in docs:
-            data = doc.to_dict()
+        # uid -> list of formatted slot matches; a dict so the exact-index
+        # hits and the substring paths below merge instead of double-listing
+        matched = {}
+        truncated = False
+        # exact matches come straight from the items_index subcollection
+        index_hits = await get_item_index(item)
+        for user_id, slots in index_hits.items():
+            if len(matched) >= FINDITEM_MAX_RESULTS:
+                truncated = True
+                break
+            data = await get_user(user_id)
+            if not data:
+                continue
             gear = data.get("gear", {})
             matches = []
-            for slot, slot_data in gear.items():
+            for slot in slots:
+                slot_data = gear.get(slot, {})
                 item_value = slot_data.get("item")
-                if item_value and search_term in item_value.strip().lower():
-                    if slot_data.get("looted"):
-                        status_str = "~~" + item_value.strip() + "~~"
-                        slot = "🔴 " + slot
-                    else: 
-                        status_str = f"{item_value.strip()}"
-                        slot = "🟢 " + slot
-                    matches.append(f"{slot}: {status_str}")
+                if item_value:
+                    matches.append(format_gear_match(slot, item_value, slot_data.get("looted")))
             if matches:
-                try:
-                    user = await self.bot.fetch_user(int(doc.id))
-                    results.append(f"{format_user(user)} - " + ", ".join(matches))
-                except Exception:
-                    results.append(f"UserID {doc.id} - " + ", ".join(matches))
+                matched[int(user_id)] = matches
+        # substring semantics: even with exact hits, "sword" must still find
+        # "great sword", so the token/scan paths always run and merge in
+        if not truncated:
+            # whole-word pre-pass: the item_tokens array index returns
+            # candidate documents server-side and can fill the result cap
+            # before the scan below has to stream anything
+            first_token = search_term.split()[0] if search_term else ""
+            if first_token:
+                candidates = await query_users_with_token(
+                    first_token, select=["gear", "items_lower"]
+                )
+                for doc in candidates:
+                    uid = int(doc.id)
+                    if uid not in matched and len(matched) >= FINDITEM_MAX_RESULTS:
+                        truncated = True
+                        break
+                    matches = _gear_substring_matches(doc.to_dict(), search_term)
+                    if matches:
+                        # substring matches are a superset of any exact hits
+                        matched[uid] = matches
+        if not truncated:
+            # the paged scan always runs unless the cap is already hit:
+            # mid-word substrings ("sword" in "greatsword") and docs that
+            # predate the token field never appear in the indexed pre-passes,
+            # so skipping it would silently change the result set
+            async for doc in iter_users(select=["gear", "items_lower"]):
+                uid = int(doc.id)
+                if uid not in matched and len(matched) >= FINDITEM_MAX_RESULTS:
+                    truncated = True
+                    break
+                matches = _gear_substring_matches(doc.to_dict(), search_term)
+                if matches:
+                    matched[uid] = matches
+        displays = await fetch_user_displays(self.bot, list(matched), guild=ctx.guild)
+        results = []
+        for uid, matches in matched.items():
+            display = displays.get(uid)
+            if display is not None:
+                results.append(f"{display} - " + ", ".join(matches))
+            else:
+                results.append(f"UserID {uid} - " + ", ".join(matches))
         if not results:
             await ctx.send(f"No users found with item containing **{item}**.")
         else:
-            full_message = "Matches found:\n" + "\n".join(results)
-            for chunk in split_message(full_message):
-                await ctx.send(chunk)
+            if truncated:
+                results.append(f"...showing the first {FINDITEM_MAX_RESULTS} matches; refine the search term for more.")
+            await send_chunks(ctx, "Matches found:\n" + "\n".join(results))
 
     @commands.command(name="findbonusloot")
     async def find_bonusloot(self, ctx, *, item: str):
-        def fetch_users():
-            db = get_db()
-            return list(db.collection("users").stream())
-        docs = await asyncio.to_thread(fetch_users)
-        results = []
+        await ctx.typing()
         search_term = item.strip().lower()
-        for doc in docs:
-            data = doc.to_dict()
-            bonus_list = data.get("bonusloot", [])
-            matches = []
-            for entry in bonus_list:
-                matches.append(entry.strip())
-            if matches:
-                try:
-                    user = await self.bot.fetch_user(int(doc.id))
-                    results.append(f"{format_user(user)} - " + ", ".join(matches))
-                except Exception:
-                    results.append(f"UserID {doc.id} - " + ", ".join(matches))
+        matched = []
+        # a bare slot name can be answered server-side via the denormalized
+        # bonusloot_slots array instead of streaming the whole collection
+        slot_query = GEAR_SLOT_LOOKUP.get(search_term.rstrip(":"))
+        if slot_query is not None:
+            prefix = GEAR_SLOT_PREFIXES[slot_query]
+            docs = await query_users_with_bonusloot_slot(slot_query, select=["bonusloot"])
+            for doc in docs:
+                data = doc.to_dict()
+                matches = [entry.strip() for entry in data.get("bonusloot", [])
+                           if entry.startswith(prefix)]
+                if matches:
+                    matched.append((int(doc.id), matches))
+        else:
+            async for doc in iter_users(select=["bonusloot"]):
+                data = doc.to_dict()
+                matches = [entry.strip() for entry in data.get("bonusloot", [])]
+                if matches:
+                    matched.append((int(doc.id), matches))
+        # resolve all display names in one bounded concurrent pass instead of
+        # one fetch_user round-trip per matched user
+        displays = await fetch_user_displays(self.bot, [uid for uid, _ in matched], guild=ctx.guild)
+        results = []
+        for uid, matches in matched:
+            display = displays.get(uid)
+            if display is not None:
+                results.append(f"{display} - " + ", ".join(matches))
+            else:
+                results.append(f"UserID {uid} - " + ", ".join(matches))
         if not results:
             await ctx.send(f"No users found with bonus loot containing **{item}**.")
         else:
-            full_message = "Matches found:\n" + "\n".join(results)
-            for chunk in split_message(full_message):
-                await ctx.send(chunk)
+            await send_chunks(ctx, "Matches found:\n" + "\n".join(results))
 
     @commands.command(name="assignloot")
     async def assign_loot(self, ctx, user_identifier: str, slot: str, source: str = None):
@@ -109,34 +215,42 @@ class AdminCommands(commands.Cog):
         Optionally, specify the source (e.g., WB, GR) to indicate where the loot was obtained.
         Usage: !ezloot assignloot <user_identifier> <slot>
         """
-        member = await resolve_member(ctx, user_identifier)
+        # numeric identifiers are already the Firestore doc ID, so warm the
+        # user cache concurrently with the Discord member resolution
+        prefetch = None
+        if user_identifier.isdigit():
+            prefetch = asyncio.create_task(get_user(user_identifier))
+        try:
+            member = await resolve_member(ctx, user_identifier)
+        finally:
+            if prefetch is not None:
+                await prefetch
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
-        user_data = await get_user(user_id)
-        if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {GEAR_SLOTS_STR}")
             return
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
-            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {', '.join(GEAR_SLOTS)}")
+        slot = canonical
+        slot_data = await get_user_slot(user_id, slot)
+        if slot_data is None:
+            await ctx.send(f"{member_display} is not registered.")
             return
-        gear = user_data.get("gear", {})
-        slot_data = gear.get(slot, {})
         if slot_data.get("item") is None:
-            await ctx.send(f"{format_user(member)} does not have an item set for **{slot}**.")
+            await ctx.send(f"{member_display} does not have an item set for **{slot}**.")
             return
         if slot_data.get("looted"):
-            await ctx.send(f"{format_user(member)}'s **{slot}** item has already been awarded.")
+            await ctx.send(f"{member_display}'s **{slot}** item has already been awarded.")
             return
         loot_entry = canonical_loot_entry(slot, slot_data['item'])
         if source:
             loot_entry += f" (obtained from {source})"
-        await lock_gear_slot(user_id, slot)
-        await add_loot(user_id, loot_entry)
-        await ctx.send(f"Loot assigned to {format_user(member)} for **{slot}**: **{slot_data['item']}**.")
-        await log_interaction(ctx.author, "assignloot", f"Assigned loot for {format_user(member)} ({slot}: {slot_data['item']}){f' from {source}' if source else ''}")
+        await assign_loot_entry(user_id, slot, loot_entry)
+        await ctx.send(f"Loot assigned to {member_display} for **{slot}**: **{slot_data['item']}**.")
+        await log_interaction(ctx.author, "assignloot", f"Assigned loot for {member_display} ({slot}: {slot_data['item']}){f' from {source}' if source else ''}")
     
     @commands.command(name="assignbonusloot")
     async def assign_bonusloot(self, ctx, user_identifier: str, slot: str, *, loot: str):
@@ -148,19 +262,21 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
         user_data = await get_user(user_id)
         if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+            await ctx.send(f"{member_display} is not registered.")
             return
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
-            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {', '.join(GEAR_SLOTS)}")
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {GEAR_SLOTS_STR}")
             return
+        slot = canonical
         bonus_entry = canonical_loot_entry(slot, loot)
         await add_bonusloot(user_id, bonus_entry)
-        await ctx.send(f"Bonus loot assigned to {format_user(member)} for **{slot}**: **{loot}**.")
-        await log_interaction(ctx.author, "assignbonusloot", f"Assigned bonus loot for {format_user(member)} ({slot}: {loot})")
+        await ctx.send(f"Bonus loot assigned to {member_display} for **{slot}**: **{loot}**.")
+        await log_interaction(ctx.author, "assignbonusloot", f"Assigned bonus loot for {member_display} ({slot}: {loot})")
         
     @commands.command(name="addpity")
     async def add_pity_command(self, ctx, user_identifier: str):
@@ -172,30 +288,33 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
-        await add_pity(user_id)
-        user_data = await get_user(user_id)
-        new_pity = user_data.get("pity", 0)
-        await ctx.send(f"Pity level for {format_user(member)} has been incremented to {new_pity}.")
-        await log_interaction(ctx.author, "addpity", f"Incremented pity for {format_user(member)} to {new_pity}")
+        new_pity = await add_pity(user_id)
+        if new_pity is None:
+            await ctx.send(f"{member_display} is not registered.")
+            return
+        await ctx.send(f"Pity level for {member_display} has been incremented to {new_pity}.")
+        await log_interaction(ctx.author, "addpity", f"Incremented pity for {member_display} to {new_pity}")
         
     @commands.command(name="setpity")
-    async def add_pity_command(self, ctx, user_identifier: str, pity_level: int):
+    async def set_pity_command(self, ctx, user_identifier: str, pity_level: int):
         """
         Admin: Set the pity level for a user to a specified amount.
-        Usage: !ezloot addpity <user_identifier> <pity_level>
+        Usage: !ezloot setpity <user_identifier> <pity_level>
         """
         member = await resolve_member(ctx, user_identifier)
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
-        await set_pity(user_id, pity_level)
-        user_data = await get_user(user_id)
-        new_pity = user_data.get("pity", 0)
-        
-        await ctx.send(f"Pity level for {format_user(member)} has been set to {new_pity}.")
-        await log_interaction(ctx.author, "setpity", f"Set pity for {format_user(member)} to {new_pity}")
+        new_pity = await set_pity(user_id, pity_level)
+        if new_pity is None:
+            await ctx.send(f"{member_display} is not registered.")
+            return
+        await ctx.send(f"Pity level for {member_display} has been set to {new_pity}.")
+        await log_interaction(ctx.author, "setpity", f"Set pity for {member_display} to {new_pity}")
     
     @commands.command(name="editgear")
     async def edit_gear(self, ctx, user_identifier: str, slot: str, *, new_item: str):
@@ -207,21 +326,23 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
 
         user_id = str(member.id)
         user_data = await get_user(user_id)
         if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+            await ctx.send(f"{member_display} is not registered.")
             return
 
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
-            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {', '.join(GEAR_SLOTS)}")
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {GEAR_SLOTS_STR}")
             return
+        slot = canonical
        
         await update_gear_item(user_id, slot, new_item)
-        await ctx.send(f"Gear for {format_user(member)} in slot **{slot}** has been updated to **{new_item}**.")
-        await log_interaction(ctx.author, "editgear", f"Edited gear for {format_user(member)} ({slot}) to {new_item}")
+        await ctx.send(f"Gear for {member_display} in slot **{slot}** has been updated to **{new_item}**.")
+        await log_interaction(ctx.author, "editgear", f"Edited gear for {member_display} ({slot}) to {new_item}")
 
     @commands.command(name="unlock")
     async def unlock(self, ctx, user_identifier: str, slot: str):
@@ -230,18 +351,21 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
-        user_data = await get_user(user_id)
-        if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {GEAR_SLOTS_STR}")
             return
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
-            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {', '.join(GEAR_SLOTS)}")
+        slot = canonical
+        # only existence matters here, so read just the one slot
+        slot_data = await get_user_slot(user_id, slot)
+        if slot_data is None:
+            await ctx.send(f"{member_display} is not registered.")
             return
         await unlock_gear_slot(user_id, slot)
-        await ctx.send(f"{format_user(member)}'s **{slot}** slot has been unlocked.")
-        await log_interaction(ctx.author, "unlock", f"Unlocked {format_user(member)}'s {slot} slot")
+        await ctx.send(f"{member_display}'s **{slot}** slot has been unlocked.")
+        await log_interaction(ctx.author, "unlock", f"Unlocked {member_display}'s {slot} slot")
 
     @commands.command(name="removegear")
     async def remove_gear(self, ctx, user_identifier: str, slot: str):
@@ -250,18 +374,20 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
         user_data = await get_user(user_id)
         if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+            await ctx.send(f"{member_display} is not registered.")
             return
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
             await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot.")
             return
+        slot = canonical
         await remove_gear_item(user_id, slot)
-        await ctx.send(f"Gear for slot **{slot}** has been reset for {format_user(member)}.")
-        await log_interaction(ctx.author, "removegear", f"Removed gear for {format_user(member)} ({slot})")
+        await ctx.send(f"Gear for slot **{slot}** has been reset for {member_display}.")
+        await log_interaction(ctx.author, "removegear", f"Removed gear for {member_display} ({slot})")
 
     @commands.command(name="removeloot")
     async def remove_loot_cmd(self, ctx, user_identifier: str, slot: str):
@@ -272,22 +398,26 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
         user_data = await get_user(user_id)
         if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+            await ctx.send(f"{member_display} is not registered.")
             return
-        slot = slot.capitalize()
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {GEAR_SLOTS_STR}")
+            return
+        slot = canonical
         loot_list = user_data.get("loot", [])
-        prefix = f"{slot}: "
+        prefix = GEAR_SLOT_PREFIXES[slot]
         entries_to_remove = [entry for entry in loot_list if entry.startswith(prefix)]
         if not entries_to_remove:
-            await ctx.send(f"No loot entry found for slot **{slot}** in {format_user(member)}'s record.")
+            await ctx.send(f"No loot entry found for slot **{slot}** in {member_display}'s record.")
             return
-        for entry in entries_to_remove:
-            await remove_loot(user_id, entry)
-        await ctx.send(f"Loot entry for slot **{slot}** has been removed from {format_user(member)}'s record.")
-        await log_interaction(ctx.author, "removeloot", f"Removed loot for {format_user(member)} ({slot})")
+        await remove_loot(user_id, entries_to_remove)
+        await ctx.send(f"Loot entry for slot **{slot}** has been removed from {member_display}'s record.")
+        await log_interaction(ctx.author, "removeloot", f"Removed loot for {member_display} ({slot})")
 
     @commands.command(name="removebonusloot")
     async def remove_bonusloot(self, ctx, user_identifier: str, slot: str):
@@ -298,22 +428,26 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         user_id = str(member.id)
         user_data = await get_user(user_id)
         if not user_data:
-            await ctx.send(f"{format_user(member)} is not registered.")
+            await ctx.send(f"{member_display} is not registered.")
+            return
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"{ctx.author.mention}, `{slot}` is not a valid gear slot. Valid slots: {GEAR_SLOTS_STR}")
             return
-        slot = slot.capitalize()
+        slot = canonical
         bonus_list = user_data.get("bonusloot", [])
-        prefix = f"{slot}: "
+        prefix = GEAR_SLOT_PREFIXES[slot]
         entries_to_remove = [entry for entry in bonus_list if entry.startswith(prefix)]
         if not entries_to_remove:
-            await ctx.send(f"No bonus loot entry found for slot **{slot}** in {format_user(member)}'s record.")
+            await ctx.send(f"No bonus loot entry found for slot **{slot}** in {member_display}'s record.")
             return
-        for entry in entries_to_remove:
-            await remove_bonusloot(user_id, entry)
-        await ctx.send(f"Bonus loot entry for slot **{slot}** has been removed from {format_user(member)}'s record.")
-        await log_interaction(ctx.author, "removebonusloot", f"Removed bonus loot for {format_user(member)} ({slot})")
+        await remove_bonusloot(user_id, entries_to_remove)
+        await ctx.send(f"Bonus loot entry for slot **{slot}** has been removed from {member_display}'s record.")
+        await log_interaction(ctx.author, "removebonusloot", f"Removed bonus loot for {member_display} ({slot})")
 
     @commands.command(name="removeuser")
     async def remove_user(self, ctx, user_identifier: str):
@@ -328,80 +462,52 @@ class AdminCommands(commands.Cog):
         if member is None:
             await ctx.send(f"Could not resolve user '{user_identifier}'.")
             return
+        member_display = format_user(member)
         
-        if member.id in ADMIN_IDS or (hasattr(member, 'guild_permissions') and member.guild_permissions.administrator):
+        if is_admin_id(member.id) or (hasattr(member, 'guild_permissions') and member.guild_permissions.administrator):
             await ctx.send("Cannot remove an administrator from the database.")
             return
 
         user_id = str(member.id)
-        db = get_db()
-        doc_ref = db.collection("users").document(user_id)
-        doc = await asyncio.to_thread(doc_ref.get)
+        doc_ref = user_ref(user_id)
+        doc = await doc_ref.get()
         if not doc.exists:
-            await ctx.send(f"{format_user(member)} is not registered in the database.")
+            await ctx.send(f"{member_display} is not registered in the database.")
             return
-        await asyncio.to_thread(doc_ref.delete)
-        await ctx.send(f"User {format_user(member)} has been removed from the database.")
-        await log_interaction(ctx.author, "removeuser", f"Removed user {format_user(member)} [{user_id}] from the database.")
+        data = doc.to_dict()
+        await doc_ref.delete()
+        invalidate_user(user_id)
+        invalidate_user_ids()
+        invalidate_username(user_id)
+        await adjust_guild_totals(
+            loot=-len(data.get("loot", [])), bonusloot=-len(data.get("bonusloot", []))
+        )
+        await ctx.send(f"User {member_display} has been removed from the database.")
+        await log_interaction(ctx.author, "removeuser", f"Removed user {member_display} [{user_id}] from the database.")
 
     @commands.command(name="guildtotal")
     async def guild_total(self, ctx):
-        """Admin: Show a detailed report of loot assignments across all users."""
-        from utils.db import get_db  # use get_db() instead of importing db
-        db_instance = get_db()
-        docs = await asyncio.to_thread(lambda: list(db_instance.collection("users").stream()))
-        report_lines = ["**Guild Loot Report:**"]
-        for doc in docs:
-            data = doc.to_dict()
-            user_id = doc.id
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                user_display = f"{user.name} ({user.mention})"
-            except Exception:
-                user_display = f"Unknown User ({user_id})"
-            user_loot = data.get("loot", [])
-            bonus_loot = data.get("bonusloot", [])
-            if user_loot or bonus_loot:
-                report_lines.append(f"**{user_display}:**")
-                if user_loot:
-                    report_lines.append("  **Regular Loot:**")
-                    for loot in user_loot:
-                        report_lines.append(f"  - {loot}")
-                if bonus_loot:
-                    report_lines.append("  **Bonus Loot:**")
-                    for loot in bonus_loot:
-                        report_lines.append(f"  - {loot}")
-                report_lines.append("")  # blank line for separation
-        if len(report_lines) == 1:
-            await ctx.send("No loot has been assigned yet.")
+        """Admin: Show the total count of loot pieces awarded across all users."""
+        await ctx.typing()
+        totals = await get_guild_totals()
+        if totals is None:
+            # counters have never been seeded (normally startup handles this):
+            # scan once and store the result so future calls are a point read
+            total_loot, total_bonusloot = await seed_guild_totals()
         else:
-            from utils.helpers import split_message  # assuming this helper exists
-            full_report = "\n".join(report_lines)
-            for chunk in split_message(full_report):
-                await ctx.send(chunk)
+            total_loot, total_bonusloot = totals
+        if not total_loot and not total_bonusloot:
+            await ctx.send("No loot has been assigned yet.")
+            return
+        await ctx.send(
+            f"**Guild Loot Total:** {total_loot + total_bonusloot} pieces "
+            f"({total_loot} regular, {total_bonusloot} bonus)."
+        )
 
     @commands.command(name="admincommands")
     async def admin_help(self, ctx):
         """Admin: Display a list of all admin commands."""
-        help_text = (
-            "**Admin Commands:**\n"
-            "`!ezloot listusers` - List all registered users.\n"
-            "`!ezloot finditem <item>` - Find users with a specified item in their gear (substring matching) and display lock status.\n"
-            "`!ezloot findbonusloot <item>` - Find users with bonus loot entries containing a specified string.\n"
-            "`!ezloot assignloot <user_identifier> <slot> <optional_origin>` - Assign loot to a user for a specific gear slot (locks the slot).\n"
-            "`!ezloot assignbonusloot <user_identifier> <slot> <loot>` - Assign bonus loot to a user.\n"
-            "`!ezloot addpity <user_identifier>` - Increment the pity level for a user by 1.\n"
-            "`!ezloot setpity <user_identifier> <pity_level>` - Set the pity level for a user to a specified amount.\n"
-            "`!ezloot editgear <user_identifier> <slot> <new_item>` - Edit a user's gear slot.\n"
-            "`!ezloot unlock <user_identifier> <slot>` - Unlock a gear slot for a user.\n"
-            "`!ezloot removegear <user_identifier> <slot>` - Reset a gear slot for a user.\n"
-            "`!ezloot removeloot <user_identifier> <slot>` - Remove the loot entry for a specified slot from a user's record.\n"
-            "`!ezloot removebonusloot <user_identifier> <slot>` - Remove the bonus loot entry for a specified slot from a user's record.\n"
-            "`!ezloot removeuser <user_identifier>` - Remove a user from the database (non-admin users only).\n"
-            "`!ezloot guildtotal` - Show the total count of loot pieces awarded across all users.\n"
-            "`!ezloot admincommands` - Show this help message.\n"
-        )
-        await ctx.send(help_text)
+        await ctx.send(ADMIN_HELP_TEXT)
 
 async def setup(bot):
     await bot.add_cog(AdminCommands(bot))
@@ -1,11 +1,32 @@
 # cogs/user_commands.py
 import discord
 from discord.ext import commands
-from utils.db import get_user, register_user, update_gear_item, is_admin
-from utils.helpers import resolve_member
-from utils.config import GEAR_SLOTS
+from utils.db import get_user, get_user_slot, register_user, update_gear_item, is_admin
+from utils.helpers import resolve_member, send_chunks
+from utils.config import GEAR_SLOTS, GEAR_SLOT_LOOKUP, GEAR_SLOTS_STR
 from utils.logging import log_interaction, format_user
 
+# static command text, built once at import instead of per invocation
+REGISTER_DM_TEXT = (
+    "Registration successful!\n"
+    "DM Commands:\n"
+    "• `!ezloot set <slot> <item>`\n"
+    "• `!ezloot edit <slot> <new_item>`\n"
+    "• `!ezloot showgear`\n"
+    "• `!ezloot showloot`\n"
+    "• `!ezloot commands`"
+)
+
+USER_HELP_TEXT = (
+    "**User Commands (DM only):**\n"
+    "`!ezloot register` - Register yourself and then DM for further commands.\n"
+    "`!ezloot set <slot> <item>` - Record an item for a gear slot.\n"
+    "`!ezloot edit <slot> <new_item>` - Edit the recorded item for a gear slot.\n"
+    "`!ezloot showgear` - Display your gear.\n"
+    "`!ezloot showloot` - Show your loot.\n"
+    "`!ezloot pity` - Show your current pity level.\n"
+)
+
 class UserCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -14,27 +35,20 @@ class UserCommands(commands.Cog):
     async def register(self, ctx):
         """Register yourself and then DM for further commands."""
         user_id = str(ctx.author.id)
+        mention = ctx.author.mention
         user_data = await get_user(user_id)
         if user_data:
-            await ctx.send(f"{ctx.author.mention}, you are already registered.")
+            await ctx.send(f"{mention}, you are already registered.")
             return
         success = await register_user(user_id, ctx.author.name)
         if success:
-            await ctx.send(f"{ctx.author.mention}, you have been registered! Please DM for further commands.")
+            await ctx.send(f"{mention}, you have been registered! Please DM for further commands.")
             try:
-                await ctx.author.send(
-                    "Registration successful!\n"
-                    "DM Commands:\n"
-                    "• `!ezloot set <slot> <item>`\n"
-                    "• `!ezloot edit <slot> <new_item>`\n"
-                    "• `!ezloot showgear`\n"
-                    "• `!ezloot showloot`\n"
-                    "• `!ezloot commands`"
-                )
+                await ctx.author.send(REGISTER_DM_TEXT)
             except discord.Forbidden:
                 await ctx.send("I couldn't DM you. Enable DMs from server members.")
         else:
-            await ctx.send(f"{ctx.author.mention}, registration failed. Please try again.")
+            await ctx.send(f"{mention}, registration failed. Please try again.")
             
     def dm_only_check(ctx):
         # admins bypass dm only restriction
@@ -47,16 +61,16 @@ class UserCommands(commands.Cog):
     async def set_item(self, ctx, slot: str, *, item: str):
         """Set an item for a given gear slot."""
         user_id = str(ctx.author.id)
-        user_data = await get_user(user_id)
-        if not user_data:
-            await ctx.send("Please register first using !ezloot register in the public channel.")
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
+            await ctx.send(f"`{slot}` is not a valid gear slot. Valid: {GEAR_SLOTS_STR}")
             return
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
-            await ctx.send(f"`{slot}` is not a valid gear slot. Valid: {', '.join(GEAR_SLOTS)}")
+        slot = canonical
+        # projected read: only this slot's data is needed for validation
+        slot_data = await get_user_slot(user_id, slot)
+        if slot_data is None:
+            await ctx.send("Please register first using !ezloot register in the public channel.")
             return
-        gear = user_data.get("gear", {})
-        slot_data = gear.get(slot, {})
         if slot_data.get("looted"):
             await ctx.send(f"Your **{slot}** slot is locked as loot has been assigned.")
             return
@@ -72,16 +86,15 @@ class UserCommands(commands.Cog):
     async def edit_item(self, ctx, slot: str, *, new_item: str):
         """Edit the recorded item for a given gear slot."""
         user_id = str(ctx.author.id)
-        user_data = await get_user(user_id)
-        if not user_data:
-            await ctx.send("Please register first using !ezloot register in the public channel.")
-            return
-        slot = slot.capitalize()
-        if slot not in GEAR_SLOTS:
+        canonical = GEAR_SLOT_LOOKUP.get(slot.lower())
+        if canonical is None:
             await ctx.send(f"`{slot}` is not a valid gear slot.")
             return
-        gear = user_data.get("gear", {})
-        slot_data = gear.get(slot, {})
+        slot = canonical
+        slot_data = await get_user_slot(user_id, slot)
+        if slot_data is None:
+            await ctx.send("Please register first using !ezloot register in the public channel.")
+            return
         if slot_data.get("looted"):
             await ctx.send(f"You cannot change **{slot}** because loot has been assigned.")
             return
@@ -108,7 +121,8 @@ class UserCommands(commands.Cog):
             target = ctx.author
 
         user_id = str(target.id)
-        user_data = await get_user(user_id)
+        # only the pity counter is needed, so project the read on a cache miss
+        user_data = await get_user(user_id, fields=["pity"])
         if not user_data:
             await ctx.send(f"{target.mention} is not registered.")
             return
@@ -136,7 +150,10 @@ class UserCommands(commands.Cog):
             return
         gear = user_data.get("gear", {})
         lines = []
-        for slot, data in gear.items():
+        # iterate GEAR_SLOTS directly so output order is deterministic and
+        # slots missing from older documents still render
+        for slot in GEAR_SLOTS:
+            data = gear.get(slot, {})
             item_val = data.get("item", "Not set")
             if data.get("looted"):
                 lines.append(f"🔴 **{slot}**: ~~{item_val}~~")
@@ -166,34 +183,27 @@ class UserCommands(commands.Cog):
             return
         normal_loot = user_data.get("loot", [])
         bonus_loot = user_data.get("bonusloot", [])
+        # one C-level join builds the dash-prefixed list instead of an
+        # f-string allocation per entry
         response_lines = [f"**{target.name}'s Loot:**"]
         if normal_loot:
-            response_lines.append("**Regular Loot:**")
-            response_lines.extend(f"- {entry}" for entry in normal_loot)
+            response_lines.append("**Regular Loot:**" + "\n- ".join([""] + normal_loot))
         else:
             response_lines.append("No regular loot assigned.")
         response_lines.append("")  # blank separator
         if bonus_loot:
-            response_lines.append("**Bonus Loot:**")
-            response_lines.extend(f"- {entry}" for entry in bonus_loot)
+            response_lines.append("**Bonus Loot:**" + "\n- ".join([""] + bonus_loot))
         else:
             response_lines.append("No bonus loot assigned.")
-        await ctx.send("\n".join(response_lines))
+        # long loot lists exceed Discord's 2000-char limit; chunk instead of
+        # letting the send fail outright
+        await send_chunks(ctx, "\n".join(response_lines))
 
     @commands.command(name="commands")
     @commands.check(dm_only_check)
     async def user_help(self, ctx):
         """Display a list of all user commands."""
-        help_text = (
-            "**User Commands (DM only):**\n"
-            "`!ezloot register` - Register yourself and then DM for further commands.\n"
-            "`!ezloot set <slot> <item>` - Record an item for a gear slot.\n"
-            "`!ezloot edit <slot> <new_item>` - Edit the recorded item for a gear slot.\n"
-            "`!ezloot showgear` - Display your gear.\n"
-            "`!ezloot showloot` - Show your loot.\n"
-            "`!ezloot pity` - Show your current pity level.\n"
-        )
-        await ctx.send(help_text)
+        await ctx.send(USER_HELP_TEXT)
 
 async def setup(bot):
     await bot.add_cog(UserCommands(bot))
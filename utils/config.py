@@ -1,15 +1,53 @@
 # utils/config.py
 import os
+import json
 from dotenv import load_dotenv
 
+try:
+    # optional: faster JSON decoding for the service-account certificate
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 FIREBASE_CERTIFICATE = os.getenv("FIREBASE_CERTIFICATE")
 LOG_CHANNEL_ID = os.getenv("LOG_CHANNEL_ID")
 
+# parsed service-account dict, memoized so the JSON is only decoded once
+_FIREBASE_CONFIG = None
+
+def load_firebase_config():
+    """
+    Parse the FIREBASE_CERTIFICATE env var into a service-account dict.
+    The private_key PEM may arrive with its newlines as literal \\n escapes
+    (common when the JSON is pasted into an env var), so repair just that
+    field instead of string-mangling the whole certificate.
+    """
+    global _FIREBASE_CONFIG
+    if _FIREBASE_CONFIG is None:
+        if orjson is not None:
+            config = orjson.loads(FIREBASE_CERTIFICATE)
+        else:
+            config = json.loads(FIREBASE_CERTIFICATE)
+        private_key = config.get("private_key")
+        if private_key and "\\n" in private_key:
+            config["private_key"] = private_key.replace("\\n", "\n")
+        _FIREBASE_CONFIG = config
+    return _FIREBASE_CONFIG
+
 GEAR_SLOTS = [
-    "Head", "Cloak", "Chest", "Gloves", "Legs", "Boots", 
-    "Earrings", "Necklace", "Bracelet", "Belt", "Ring1", "Ring2", 
+    "Head", "Cloak", "Chest", "Gloves", "Legs", "Boots",
+    "Earrings", "Necklace", "Bracelet", "Belt", "Ring1", "Ring2",
     "Weapon1", "Weapon2", "Arch1", "Arch2",
 ]
+
+# precomputed views of GEAR_SLOTS for the hot command path: O(1) membership,
+# lowercase -> canonical name resolution, and the error-message listing
+GEAR_SLOTS_SET = frozenset(GEAR_SLOTS)
+GEAR_SLOT_LOOKUP = {slot.lower(): slot for slot in GEAR_SLOTS}
+GEAR_SLOTS_STR = ", ".join(GEAR_SLOTS)
+# loot entries are stored as "Slot: item"; the prefixes used to match them
+# are constant per slot, so build them once instead of per command invocation
+GEAR_SLOT_PREFIXES = {slot: f"{slot}: " for slot in GEAR_SLOTS}
@@ -1,123 +1,710 @@
 # utils/db.py
 import os
+import time
 import asyncio
 import firebase_admin
-from firebase_admin import credentials, firestore
-from utils.config import FIREBASE_CERTIFICATE, GEAR_SLOTS
+from firebase_admin import credentials, firestore, firestore_async
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore_v1.base_query import FieldFilter
+from utils.config import load_firebase_config, GEAR_SLOTS
 
 if not firebase_admin._apps:
-    cred = credentials.Certificate(FIREBASE_CERTIFICATE)
+    cred = credentials.Certificate(load_firebase_config())
     firebase_admin.initialize_app(cred)
 
+# single shared async client; its gRPC channel is HTTP/2 and multiplexes
+# concurrent requests, so one channel serves the whole bot
+_DB = None
+
 def get_db():
-    """Return a Firestore client."""
-    return firestore.client()
+    """Return the shared async Firestore client."""
+    global _DB
+    if _DB is None:
+        _DB = firestore_async.client()
+    return _DB
+
+# cached per-user DocumentReferences: every helper used to rebuild the same
+# protobuf document path; build it once per user instead
+_USER_REFS = {}
 
-# global admin ids
-ADMIN_IDS = set()
+def user_ref(user_id: str):
+    """Return the (cached) DocumentReference for a user document."""
+    ref = _USER_REFS.get(user_id)
+    if ref is None:
+        ref = _USER_REFS[user_id] = get_db().collection("users").document(user_id)
+    return ref
+
+# global admin ids, loaded once at startup; frozenset so every is_admin call
+# is a pure hash probe with no Firestore traffic
+ADMIN_IDS = frozenset()
+ADMIN_REFRESH_INTERVAL = 300
+_last_admin_refresh = 0.0
 
 async def load_admin_ids():
     """
-    Load admin IDs from Firestore.
-    Assumes a document at config/admins with a field "ids" containing an array of IDs.
+    Load admin IDs from Firestore into the module-level frozenset.
+    Assumes a document at config/admins with a field "ids" containing an array
+    of IDs. Call again to refresh after the admin list changes.
     """
     global ADMIN_IDS
     db_instance = get_db()
     doc_ref = db_instance.collection("config").document("admins")
-    doc = await asyncio.to_thread(doc_ref.get)
+    doc = await doc_ref.get()
     if doc.exists:
         data = doc.to_dict()
         ids = data.get("ids", [])
-        ADMIN_IDS = set(int(i) for i in ids)
+        ADMIN_IDS = frozenset(map(int, ids))
     else:
-        ADMIN_IDS = set()
+        ADMIN_IDS = frozenset()
+    global _last_admin_refresh
+    _last_admin_refresh = time.monotonic()
+
+def watch_admin_ids():
+    """
+    Attach a snapshot listener to config/admins so admin changes propagate
+    in near-real-time without a restart. The listener needs the sync client
+    (the async client has no on_snapshot); its callback runs on a library
+    thread, but replacing the module-level frozenset is a single atomic
+    assignment, so no event-loop marshalling is required. Returns the watch
+    so callers can unsubscribe.
+    """
+    doc_ref = firestore.client().collection("config").document("admins")
+
+    def _on_snapshot(docs, changes, read_time):
+        global ADMIN_IDS, _last_admin_refresh
+        for doc in docs:
+            data = doc.to_dict() or {}
+            ADMIN_IDS = frozenset(map(int, data.get("ids", [])))
+        # mark the refresh so the periodic fallback poll skips its reload
+        _last_admin_refresh = time.monotonic()
+
+    return doc_ref.on_snapshot(_on_snapshot)
+
+async def refresh_admins_periodically(interval: int = ADMIN_REFRESH_INTERVAL):
+    """
+    Reload the admin ID set on an interval so admin changes propagate without
+    a restart. Skips the reload if something else refreshed recently (e.g.
+    setup_hook re-running on reconnect).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        if time.monotonic() - _last_admin_refresh < interval:
+            continue
+        try:
+            await load_admin_ids()
+        except Exception as e:
+            print("Error refreshing admin IDs:", e)
+
+def is_admin_id(user_id) -> bool:
+    """
+    Check an ID against the live admin set. Use this instead of importing
+    ADMIN_IDS by value: the snapshot listener rebinds the module attribute,
+    so a set imported at load time never sees later changes.
+    """
+    return int(user_id) in ADMIN_IDS
 
 def is_admin(ctx):
     """Check if the invoking user is an admin by ID or has guild administrator permissions."""
-    return ctx.author.id in ADMIN_IDS or (ctx.guild is not None and ctx.author.guild_permissions.administrator)
+    author = ctx.author
+    # set probe first: guild_permissions builds a Permissions object from the
+    # member's roles on each access, so the hash lookup is the cheap branch
+    return author.id in ADMIN_IDS or (ctx.guild is not None and author.guild_permissions.administrator)
+
+# in-process cache of user documents: user_id -> (data, expiry timestamp)
+# The TTL is only a safety net against cross-process drift; writes in this
+# module update the cached dict in place so reads stay fresh.
+USER_CACHE = {}
+USER_CACHE_TTL = 60
+USER_CACHE_MAX = 4096
+
+def _cache_get(user_id: str):
+    """Return the cached user data if present and not expired, else None."""
+    entry = USER_CACHE.get(user_id)
+    if entry is None:
+        return None
+    data, expires_at = entry
+    if time.monotonic() >= expires_at:
+        USER_CACHE.pop(user_id, None)
+        return None
+    return data
 
-async def get_user(user_id: str):
-    """Retrieve the user document from Firestore."""
+def _cache_put(user_id: str, data: dict):
+    """Cache a user document, evicting the oldest entry if the cache is full."""
+    if len(USER_CACHE) >= USER_CACHE_MAX and user_id not in USER_CACHE:
+        USER_CACHE.pop(next(iter(USER_CACHE)))
+    USER_CACHE[user_id] = (data, time.monotonic() + USER_CACHE_TTL)
+
+def invalidate_user(user_id: str):
+    """Drop a user from the cache (call after writes that bypass this module)."""
+    USER_CACHE.pop(user_id, None)
+
+# background write queue: handlers ack the user as soon as the cache is
+# updated, while queued ops are committed in batches by flush_writes
+WRITE_QUEUE = asyncio.Queue()
+WRITE_BATCH_MAX = 500  # Firestore's per-batch operation limit
+WRITE_FLUSH_INTERVAL = 1
+
+def enqueue_write(op: str, ref, data=None):
+    """Queue a Firestore write ("update", "set" or "delete") for the flusher."""
+    WRITE_QUEUE.put_nowait((op, ref, data))
+
+async def _apply_write(op: str, ref, data):
+    """Apply a single queued write directly, outside a batch."""
+    if op == "update":
+        await ref.update(data)
+    elif op == "set":
+        await ref.set(data, merge=True)
+    elif op == "delete":
+        await ref.delete()
+
+async def flush_writes():
+    """
+    Drain queued writes into batched commits. Runs forever; start it as a
+    background task from setup_hook.
+    """
     db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    doc = await asyncio.to_thread(doc_ref.get)
-    if doc.exists:
-        return doc.to_dict()
-    return None
+    while True:
+        ops = [await WRITE_QUEUE.get()]
+        while len(ops) < WRITE_BATCH_MAX:
+            try:
+                ops.append(WRITE_QUEUE.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        batch = db_instance.batch()
+        for op, ref, data in ops:
+            if op == "update":
+                batch.update(ref, data)
+            elif op == "set":
+                batch.set(ref, data, merge=True)
+            elif op == "delete":
+                batch.delete(ref)
+        try:
+            await batch.commit()
+        except Exception as e:
+            # a batch fails or succeeds as a unit, so one bad op would throw
+            # away every co-batched (already acknowledged) write; retry them
+            # one by one and lose only the op that is actually broken
+            print("Batched flush failed, retrying ops individually:", e)
+            for op, ref, data in ops:
+                try:
+                    await _apply_write(op, ref, data)
+                except Exception as op_error:
+                    print(f"Error applying queued {op} for {ref.path}:", op_error)
+        await asyncio.sleep(WRITE_FLUSH_INTERVAL)
 
-async def register_user(user_id: str, username: str):
-    """Register a new user with default gear, empty loot, and empty bonus loot."""
+async def iter_users(page: int = 500, select=None):
+    """
+    Iterate the users collection in pages of `page` documents, so scans keep
+    bounded memory instead of materializing every user at once. Pass `select`
+    to project only the needed fields.
+    """
     db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    doc = await asyncio.to_thread(doc_ref.get)
-    if doc.exists:
-        return False
+    coll = db_instance.collection("users")
+    query = coll.select(select) if select is not None else coll
+    query = query.order_by("__name__").limit(page)
+    last = None
+    while True:
+        page_query = query.start_after(last) if last is not None else query
+        batch = [doc async for doc in page_query.stream()]
+        if not batch:
+            return
+        for doc in batch:
+            yield doc
+        if len(batch) < page:
+            return
+        last = batch[-1]
+
+# snapshot of registered user IDs for listusers; refreshed on expiry and
+# invalidated by registrations/removals so the listing stays current
+USER_IDS_TTL = 300
+_USER_IDS = None
+_USER_IDS_EXPIRES = 0.0
+
+async def get_user_ids():
+    """
+    Return the registered user IDs, served from a TTL snapshot. The backing
+    query projects no fields, so a refresh streams only document names.
+    """
+    global _USER_IDS, _USER_IDS_EXPIRES
+    if _USER_IDS is not None and time.monotonic() < _USER_IDS_EXPIRES:
+        return _USER_IDS
+    _USER_IDS = [doc.id async for doc in iter_users(select=[])]
+    _USER_IDS_EXPIRES = time.monotonic() + USER_IDS_TTL
+    return _USER_IDS
+
+def invalidate_user_ids():
+    """Drop the user-ID snapshot (call after a registration or removal)."""
+    global _USER_IDS
+    _USER_IDS = None
+
+# per-user locks so concurrent cache misses for the same document trigger a
+# single Firestore read instead of a thundering herd
+_USER_FETCH_LOCKS = {}
+
+async def get_user(user_id: str, fields=None):
+    """
+    Retrieve the user document, serving from the in-process cache when possible.
+
+    Pass `fields` (a list of field paths) when only part of the document is
+    needed: on a cache miss the read is projected to those fields, cutting
+    payload bytes. The cached full document still satisfies projected calls,
+    but a projected result is never cached as the full document.
+    """
+    cached = _cache_get(user_id)
+    if cached is not None:
+        return cached
+    lock = _USER_FETCH_LOCKS.setdefault(user_id, asyncio.Lock())
+    async with lock:
+        # another coroutine may have populated the cache while we waited
+        cached = _cache_get(user_id)
+        if cached is not None:
+            return cached
+        doc_ref = user_ref(user_id)
+        if fields is not None:
+            doc = await doc_ref.get(field_paths=fields)
+            return doc.to_dict() if doc.exists else None
+        doc = await doc_ref.get()
+        if doc.exists:
+            data = doc.to_dict()
+            _cache_put(user_id, data)
+            return data
+        return None
+
+async def get_user_slot(user_id: str, slot: str):
+    """
+    Return a single gear slot's data ({"item": ..., "looted": ...}) for the
+    commands that only validate one slot. Serves from the cached full document
+    when available; otherwise reads just that slot via a field-path projection
+    instead of pulling the whole user doc. Returns None if the user is not
+    registered and {} if the slot has no data yet.
+    """
+    cached = _cache_get(user_id)
+    if cached is not None:
+        return cached.get("gear", {}).get(slot, {})
+    doc_ref = user_ref(user_id)
+    doc = await doc_ref.get(field_paths=[f"gear.{slot}"])
+    if not doc.exists:
+        return None
+    data = doc.to_dict() or {}
+    return data.get("gear", {}).get(slot, {})
+
+async def register_user(user_id: str, username: str):
+    """
+    Register a new user with default gear, empty loot, and empty bonus loot.
+    Uses Firestore's create() so the existence check and write are a single
+    atomic round-trip; returns False if the user is already registered.
+    """
+    doc_ref = user_ref(user_id)
     data = {
         "username": username,
+        # denormalized for the indexed lookup in find_user_id_by_username
+        "username_lower": username.strip().lower(),
         "gear": {slot: {"item": None, "looted": False} for slot in GEAR_SLOTS},
         "loot": [],
         "bonusloot": [],
         "pity": 0,
     }
-    await asyncio.to_thread(doc_ref.set, data)
+    try:
+        await doc_ref.create(data)
+    except AlreadyExists:
+        return False
+    _cache_put(user_id, data)
+    invalidate_user_ids()
+    _USERNAME_CACHE[data["username_lower"]] = user_id
     return True
 
+# lazily filled username_lower -> user_id map so repeated bare-username
+# admin commands skip Firestore entirely
+_USERNAME_CACHE = {}
+
+async def find_user_id_by_username(username_lower: str):
+    """
+    Resolve a registered user's document ID from their lowercased username.
+    Checks the in-memory map first, then an indexed equality query on the
+    denormalized username_lower field, then (for documents that predate that
+    field) a projected scan of the collection. Returns None when no match.
+    """
+    user_id = _USERNAME_CACHE.get(username_lower)
+    if user_id is not None:
+        return user_id
+    db_instance = get_db()
+    # keys-only projection: the match itself is the query filter, so the
+    # document ID is all that needs to come back over the wire
+    query = db_instance.collection("users").where(
+        filter=FieldFilter("username_lower", "==", username_lower)
+    ).select([]).limit(1)
+    async for doc in query.stream():
+        _USERNAME_CACHE[username_lower] = doc.id
+        return doc.id
+    async for doc in iter_users(select=["username"]):
+        data = doc.to_dict()
+        name = data.get("username")
+        if name and name.strip().lower() == username_lower:
+            _USERNAME_CACHE[username_lower] = doc.id
+            return doc.id
+    return None
+
+def invalidate_username(user_id: str):
+    """Drop any username-cache entries pointing at a removed user."""
+    for name in [n for n, uid in _USERNAME_CACHE.items() if uid == user_id]:
+        _USERNAME_CACHE.pop(name, None)
+
+def _stats_ref(db_instance):
+    """Return the reference of the guild-wide stats document."""
+    return db_instance.collection("stats").document("guild")
+
+async def adjust_guild_totals(loot: int = 0, bonusloot: int = 0):
+    """Atomically adjust the guild-wide loot counters by the given deltas."""
+    updates = {}
+    if loot:
+        updates["total_loot"] = firestore.Increment(loot)
+    if bonusloot:
+        updates["total_bonusloot"] = firestore.Increment(bonusloot)
+    if not updates:
+        return
+    db_instance = get_db()
+    enqueue_write("set", _stats_ref(db_instance), updates)
+
+async def set_guild_totals(loot: int, bonusloot: int):
+    """Seed the guild-wide loot counters with absolute values."""
+    db_instance = get_db()
+    await _stats_ref(db_instance).set(
+        {"total_loot": loot, "total_bonusloot": bonusloot}, merge=True
+    )
+
+async def get_guild_totals():
+    """
+    Read the guild-wide loot counters with a single point read.
+    Returns (total_loot, total_bonusloot), or None if the counters have not
+    been seeded yet.
+    """
+    db_instance = get_db()
+    doc = await _stats_ref(db_instance).get()
+    if not doc.exists:
+        return None
+    data = doc.to_dict()
+    if "total_loot" not in data and "total_bonusloot" not in data:
+        return None
+    return data.get("total_loot", 0), data.get("total_bonusloot", 0)
+
+async def seed_guild_totals():
+    """
+    Seed the guild-wide counters from a projected scan of every user's loot
+    arrays and return (total_loot, total_bonusloot). One-time cost; the
+    Increment deltas from adjust_guild_totals keep the counters current
+    afterwards.
+    """
+    total_loot = 0
+    total_bonusloot = 0
+    async for doc in iter_users(select=["loot", "bonusloot"]):
+        data = doc.to_dict()
+        total_loot += len(data.get("loot", []))
+        total_bonusloot += len(data.get("bonusloot", []))
+    await set_guild_totals(total_loot, total_bonusloot)
+    return total_loot, total_bonusloot
+
+async def ensure_guild_totals_seeded():
+    """
+    Seed stats/guild at startup if it has never been seeded. Without this,
+    the first Increment write would create the document holding only its own
+    delta and the seed scan would never run, permanently undercounting loot
+    that predates the counters.
+    """
+    if await get_guild_totals() is None:
+        await seed_guild_totals()
+
+async def ensure_bonusloot_slots_backfilled():
+    """
+    One-time backfill of the denormalized bonusloot_slots array for documents
+    whose bonus loot predates the field (or only partially gained it through
+    later ArrayUnions). Without it, slot-name findbonusloot queries silently
+    miss those users, since array_contains has no scan fallback. A marker in
+    config/migrations keeps this to a single projected scan per deploy.
+    """
+    db_instance = get_db()
+    marker_ref = db_instance.collection("config").document("migrations")
+    marker = await marker_ref.get()
+    if marker.exists and (marker.to_dict() or {}).get("bonusloot_slots"):
+        return
+    async for doc in iter_users(select=["bonusloot", "bonusloot_slots"]):
+        data = doc.to_dict()
+        slots = sorted({_entry_slot(e) for e in data.get("bonusloot", [])})
+        if slots != sorted(data.get("bonusloot_slots", [])):
+            await user_ref(doc.id).update({"bonusloot_slots": slots})
+    await marker_ref.set({"bonusloot_slots": True}, merge=True)
+
+def _item_index_ref(db_instance, item: str, user_id: str):
+    """Return the items_index entry reference for a (item, user) pair."""
+    return (db_instance.collection("items_index")
+            .document(item.strip().lower())
+            .collection("users").document(user_id))
+
+async def _add_item_index(db_instance, user_id: str, slot: str, item: str):
+    """Record that a user has `item` in `slot` in the inverted item index."""
+    ref = _item_index_ref(db_instance, item, user_id)
+    enqueue_write("set", ref, {slot: slot})
+
+async def _remove_item_index(db_instance, user_id: str, item: str, slot: str,
+                             still_held: bool):
+    """
+    Drop a user's `slot` entry for `item` from the inverted item index. When
+    another slot still holds the same item, only the slot key is removed so
+    the user keeps appearing in exact finditem lookups; the whole entry is
+    deleted only once no slot holds the item.
+    """
+    ref = _item_index_ref(db_instance, item, user_id)
+    if still_held:
+        enqueue_write("update", ref, {slot: firestore.DELETE_FIELD})
+    else:
+        enqueue_write("delete", ref)
+
+def _item_still_held(gear: dict, item_lower: str) -> bool:
+    """True if any slot in `gear` still holds `item_lower`."""
+    return any(
+        slot_data.get("item") and slot_data["item"].strip().lower() == item_lower
+        for slot_data in gear.values()
+    )
+
+async def get_item_index(item: str):
+    """
+    Look up users whose gear exactly matches `item` (case-insensitive) via the
+    items_index collection. Returns {user_id: [slots]}.
+    """
+    db_instance = get_db()
+    coll = (db_instance.collection("items_index")
+            .document(item.strip().lower())
+            .collection("users"))
+    docs = [doc async for doc in coll.stream()]
+    return {doc.id: sorted(doc.to_dict().values()) for doc in docs}
+
+def _items_lower(gear: dict):
+    """Build the precomputed lowercase view of a gear dict's item names."""
+    return sorted({
+        slot_data["item"].strip().lower()
+        for slot_data in gear.values()
+        if slot_data.get("item")
+    })
+
+def _item_tokens(items_lower):
+    """Split the lowercase item names into the whole-word token set."""
+    tokens = set()
+    for name in items_lower:
+        tokens.update(name.split())
+    return sorted(tokens)
+
+async def query_users_with_token(token: str, select=None):
+    """
+    Server-side query for users whose item_tokens array contains `token`
+    (a whole lowercase word from one of their gear items).
+    """
+    db_instance = get_db()
+    query = db_instance.collection("users").where(
+        filter=FieldFilter("item_tokens", "array_contains", token)
+    )
+    if select:
+        query = query.select(select)
+    return [doc async for doc in query.stream()]
+
+async def query_users_with_bonusloot_slot(slot: str, select=None):
+    """
+    Server-side query for users whose bonusloot_slots array contains `slot`.
+    """
+    db_instance = get_db()
+    query = db_instance.collection("users").where(
+        filter=FieldFilter("bonusloot_slots", "array_contains", slot)
+    )
+    if select:
+        query = query.select(select)
+    return [doc async for doc in query.stream()]
+
+# precomputed gear field paths: slots are a fixed set, so the per-slot
+# "gear.<slot>.item"/"gear.<slot>.looted" strings are built once at import
+# instead of f-string formatting on every mutation
+_SLOT_PATHS = {slot: (f"gear.{slot}.item", f"gear.{slot}.looted") for slot in GEAR_SLOTS}
+
 async def update_gear_item(user_id: str, slot: str, item: str):
-    """Update the gear item for a given slot."""
+    """Update the gear item for a given slot and maintain the item index."""
     db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {f"gear.{slot}.item": item})
+    old_item = None
+    data = await get_user(user_id)
+    if data is not None:
+        old_item = data.get("gear", {}).get(slot, {}).get("item")
+    doc_ref = user_ref(user_id)
+    item_path, _ = _SLOT_PATHS[slot]
+    update = {item_path: item}
+    if data is not None:
+        # refresh the precomputed lowercase/token views used by finditem
+        gear = dict(data.get("gear", {}))
+        gear[slot] = {"item": item}
+        update["items_lower"] = _items_lower(gear)
+        update["item_tokens"] = _item_tokens(update["items_lower"])
+    enqueue_write("update", doc_ref, update)
+    cached = _cache_get(user_id)
+    if cached is not None:
+        cached.setdefault("gear", {}).setdefault(slot, {})["item"] = item
+        if "items_lower" in update:
+            cached["items_lower"] = update["items_lower"]
+            cached["item_tokens"] = update["item_tokens"]
+    if old_item and old_item.strip().lower() != item.strip().lower():
+        still_held = _item_still_held(gear, old_item.strip().lower())
+        await _remove_item_index(db_instance, user_id, old_item, slot, still_held)
+    await _add_item_index(db_instance, user_id, slot, item)
 
 async def lock_gear_slot(user_id: str, slot: str):
     """Mark a gear slot as locked (loot assigned)."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {f"gear.{slot}.looted": True})
+    doc_ref = user_ref(user_id)
+    enqueue_write("update", doc_ref, {_SLOT_PATHS[slot][1]: True})
+    cached = _cache_get(user_id)
+    if cached is not None:
+        cached.setdefault("gear", {}).setdefault(slot, {})["looted"] = True
 
 async def unlock_gear_slot(user_id: str, slot: str):
     """Unlock a gear slot (mark loot as not assigned)."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {f"gear.{slot}.looted": False})
+    doc_ref = user_ref(user_id)
+    enqueue_write("update", doc_ref, {_SLOT_PATHS[slot][1]: False})
+    cached = _cache_get(user_id)
+    if cached is not None:
+        cached.setdefault("gear", {}).setdefault(slot, {})["looted"] = False
 
 async def add_loot(user_id: str, loot_entry: str):
     """Add a loot entry to the user's record using Firestore's ArrayUnion."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {"loot": firestore.ArrayUnion([loot_entry])})
+    doc_ref = user_ref(user_id)
+    enqueue_write("update", doc_ref, {"loot": firestore.ArrayUnion([loot_entry])})
+    cached = _cache_get(user_id)
+    if cached is not None and loot_entry not in cached.setdefault("loot", []):
+        cached["loot"].append(loot_entry)
+    await adjust_guild_totals(loot=1)
+
+async def assign_loot_entry(user_id: str, slot: str, loot_entry: str):
+    """
+    Lock a gear slot, record its loot entry, and bump the guild counter.
+    Routed through the write queue rather than a direct commit: a direct
+    commit can land before an earlier queued write against the same slot
+    (e.g. an unlock still waiting in the flusher) and then be clobbered when
+    that write flushes. The queue preserves FIFO order, and the flusher still
+    folds both ops into one batched round-trip.
+    """
+    enqueue_write("update", user_ref(user_id), {
+        _SLOT_PATHS[slot][1]: True,
+        "loot": firestore.ArrayUnion([loot_entry]),
+    })
+    enqueue_write("set", _stats_ref(get_db()), {"total_loot": firestore.Increment(1)})
+    cached = _cache_get(user_id)
+    if cached is not None:
+        cached.setdefault("gear", {}).setdefault(slot, {})["looted"] = True
+        if loot_entry not in cached.setdefault("loot", []):
+            cached["loot"].append(loot_entry)
+
+def _entry_slot(entry: str):
+    """Extract the slot name from a canonical "Slot: item" loot entry."""
+    return entry.split(":", 1)[0]
 
 async def add_bonusloot(user_id: str, bonusloot_entry: str):
     """Add a bonus loot entry to the user's record using Firestore's ArrayUnion."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {"bonusloot": firestore.ArrayUnion([bonusloot_entry])})
+    doc_ref = user_ref(user_id)
+    # bonusloot_slots mirrors the slots present in the entry list so
+    # findbonusloot can narrow slot queries server-side with array_contains
+    enqueue_write("update", doc_ref, {
+        "bonusloot": firestore.ArrayUnion([bonusloot_entry]),
+        "bonusloot_slots": firestore.ArrayUnion([_entry_slot(bonusloot_entry)]),
+    })
+    cached = _cache_get(user_id)
+    if cached is not None:
+        if bonusloot_entry not in cached.setdefault("bonusloot", []):
+            cached["bonusloot"].append(bonusloot_entry)
+        slot = _entry_slot(bonusloot_entry)
+        if slot not in cached.setdefault("bonusloot_slots", []):
+            cached["bonusloot_slots"].append(slot)
+    await adjust_guild_totals(bonusloot=1)
 
 async def remove_gear_item(user_id: str, slot: str):
     """Remove the gear item for a given slot (reset it to None and unlock it)."""
     db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {f"gear.{slot}.item": None, f"gear.{slot}.looted": False})
+    old_item = None
+    data = await get_user(user_id)
+    if data is not None:
+        old_item = data.get("gear", {}).get(slot, {}).get("item")
+    doc_ref = user_ref(user_id)
+    item_path, looted_path = _SLOT_PATHS[slot]
+    update = {item_path: None, looted_path: False}
+    if data is not None:
+        gear = dict(data.get("gear", {}))
+        gear[slot] = {"item": None}
+        update["items_lower"] = _items_lower(gear)
+        update["item_tokens"] = _item_tokens(update["items_lower"])
+    enqueue_write("update", doc_ref, update)
+    cached = _cache_get(user_id)
+    if cached is not None:
+        slot_data = cached.setdefault("gear", {}).setdefault(slot, {})
+        slot_data["item"] = None
+        slot_data["looted"] = False
+        if "items_lower" in update:
+            cached["items_lower"] = update["items_lower"]
+            cached["item_tokens"] = update["item_tokens"]
+    if old_item:
+        still_held = _item_still_held(gear, old_item.strip().lower())
+        await _remove_item_index(db_instance, user_id, old_item, slot, still_held)
 
-async def remove_loot(user_id: str, loot_entry: str):
-    """Remove a loot entry from the user's record using Firestore's ArrayRemove."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {"loot": firestore.ArrayRemove([loot_entry])})
+async def remove_loot(user_id: str, loot_entries):
+    """
+    Remove loot entries from the user's record. Accepts a single entry or a
+    list; ArrayRemove takes the whole list so N removals cost one write.
+    """
+    if isinstance(loot_entries, str):
+        loot_entries = [loot_entries]
+    doc_ref = user_ref(user_id)
+    enqueue_write("update", doc_ref, {"loot": firestore.ArrayRemove(loot_entries)})
+    cached = _cache_get(user_id)
+    if cached is not None:
+        cached["loot"] = [e for e in cached.get("loot", []) if e not in loot_entries]
+    await adjust_guild_totals(loot=-len(loot_entries))
 
-async def remove_bonusloot(user_id: str, bonusloot_entry: str):
-    """Remove a bonus loot entry from the user's record using Firestore's ArrayRemove."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {"bonusloot": firestore.ArrayRemove([bonusloot_entry])})
+async def remove_bonusloot(user_id: str, bonusloot_entries):
+    """
+    Remove bonus loot entries from the user's record. Accepts a single entry
+    or a list; ArrayRemove takes the whole list so N removals cost one write.
+    """
+    if isinstance(bonusloot_entries, str):
+        bonusloot_entries = [bonusloot_entries]
+    doc_ref = user_ref(user_id)
+    update = {"bonusloot": firestore.ArrayRemove(bonusloot_entries)}
+    data = await get_user(user_id)
+    if data is not None:
+        remaining = [e for e in data.get("bonusloot", []) if e not in bonusloot_entries]
+        gone = {_entry_slot(e) for e in bonusloot_entries} - {_entry_slot(e) for e in remaining}
+        if gone:
+            update["bonusloot_slots"] = firestore.ArrayRemove(sorted(gone))
+    enqueue_write("update", doc_ref, update)
+    cached = _cache_get(user_id)
+    if cached is not None:
+        cached["bonusloot"] = [e for e in cached.get("bonusloot", []) if e not in bonusloot_entries]
+        if data is not None and gone:
+            cached["bonusloot_slots"] = [s for s in cached.get("bonusloot_slots", []) if s not in gone]
+    await adjust_guild_totals(bonusloot=-len(bonusloot_entries))
     
 async def add_pity(user_id: str):
-    """Increment the pity level for a user by 1."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {"pity": firestore.Increment(1)})
-    
+    """
+    Increment the pity level for a user by 1 and return the new value, or
+    None when the user is not registered (nothing is queued in that case —
+    an update against a missing document would fail at commit time).
+    """
+    # populate the cache first so callers reading the new value back see it
+    # before the queued write lands
+    cached = await get_user(user_id)
+    if cached is None:
+        return None
+    enqueue_write("update", user_ref(user_id), {"pity": firestore.Increment(1)})
+    cached["pity"] = cached.get("pity", 0) + 1
+    return cached["pity"]
+
 async def set_pity(user_id: str, value: int):
-    """Set the pity level for a user to a specific value."""
-    db_instance = get_db()
-    doc_ref = db_instance.collection("users").document(user_id)
-    await asyncio.to_thread(doc_ref.update, {"pity": value})
+    """
+    Set the pity level for a user to a specific value and return it, or
+    None when the user is not registered.
+    """
+    cached = await get_user(user_id)
+    if cached is None:
+        return None
+    enqueue_write("update", user_ref(user_id), {"pity": value})
+    cached["pity"] = value
+    return value
@@ -0,0 +1,26 @@
+# utils/errors.py
+from discord.ext import commands
+
+# canned responses per command error, resolved with a single dict probe on the
+# concrete error type instead of a chain of isinstance checks
+ERROR_MESSAGES = {
+    commands.CommandNotFound: "That command does not exist. Please check your command and try again.",
+    commands.MissingRequiredArgument: "Missing required argument. Please check your command and try again.",
+    commands.BadArgument: "One or more arguments are invalid. Please check your command and try again.",
+    commands.CheckFailure: "You do not have permission to use that command, or it cannot be used here.",
+}
+
+async def handle_command_error(ctx, error):
+    """Send the canned response for a known command error, or a generic fallback."""
+    message = ERROR_MESSAGES.get(type(error))
+    if message is None:
+        # subclasses (e.g. MemberNotFound -> BadArgument) miss the exact-type
+        # probe, so fall back to isinstance before giving up
+        for error_type, canned in ERROR_MESSAGES.items():
+            if isinstance(error, error_type):
+                message = canned
+                break
+    if message is None:
+        print(f"Unhandled error: {error}")
+        message = "An error occurred while processing your command."
+    await ctx.send(f"{ctx.author.mention} {message}")
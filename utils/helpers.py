@@ -1,24 +1,105 @@
 # utils/helpers.py
 import asyncio
+import functools
+import time
 import discord
 from discord.ext import commands
-from utils.db import get_db
+from utils.db import find_user_id_by_username
+from utils.logging import format_user
 
+# how long resolved Discord display strings stay cached on the bot instance
+USER_DISPLAY_TTL = 300
+# cap on concurrent fetch_user calls so big fanouts respect Discord rate limits
+USER_FETCH_CONCURRENCY = 10
+
+async def fetch_user_displays(bot, user_ids, guild=None):
+    """
+    Resolve formatted display strings for many user IDs concurrently.
+
+    Resolution order per ID: the TTL display cache on the bot instance, then
+    the guild's cached member list (guild.get_member, zero HTTP) when a guild
+    is given, then discord.py's in-memory user cache (bot.get_user), then a
+    rate-limit-bounded concurrent fetch_user fanout. IDs that cannot be
+    fetched map to None so callers can render their own "Unknown User"
+    fallback.
+    """
+    cache = getattr(bot, "_user_display_cache", None)
+    if cache is None:
+        cache = bot._user_display_cache = {}
+    now = time.monotonic()
+    displays = {}
+    to_fetch = []
+    for uid in user_ids:
+        entry = cache.get(uid)
+        if entry is not None and entry[1] > now:
+            displays[uid] = entry[0]
+            continue
+        user = guild.get_member(uid) if guild is not None else None
+        if user is None:
+            user = bot.get_user(uid)
+        if user is not None:
+            display = format_user(user)
+            displays[uid] = display
+            cache[uid] = (display, now + USER_DISPLAY_TTL)
+        else:
+            to_fetch.append(uid)
+    if to_fetch:
+        sem = asyncio.Semaphore(USER_FETCH_CONCURRENCY)
+
+        async def fetch(uid):
+            async with sem:
+                return await bot.fetch_user(uid)
+
+        results = await asyncio.gather(
+            *(fetch(uid) for uid in to_fetch), return_exceptions=True
+        )
+        for uid, result in zip(to_fetch, results):
+            if isinstance(result, Exception):
+                displays[uid] = None
+            else:
+                display = format_user(result)
+                displays[uid] = display
+                cache[uid] = (display, now + USER_DISPLAY_TTL)
+    return displays
+
+@functools.lru_cache(maxsize=1024)
 def canonical_loot_entry(slot: str, item: str) -> str:
     """
     Generate a canonical loot entry.
-    Ensures the slot is capitalized and the item is lowercased and stripped of extra spaces.
+    The slot is expected to already be in canonical form (resolved through
+    GEAR_SLOT_LOOKUP); the item is lowercased and stripped of extra spaces.
     Format: "Slot: item"
     """
-    return f"{slot.strip().capitalize()}: {item.strip().lower()}"
+    return f"{slot}: {item.strip().lower()}"
 
 def normalize_item(item: str) -> str:
     return item.strip().lower()
 
 def split_message(message: str, max_length: int = 2000):
         """Splits the message into chunks not exceeding max_length."""
+        # the vast majority of outputs fit in one message; skip the slicing
+        # loop entirely for that common case
+        if len(message) <= max_length:
+            return [message]
         return [message[i:i + max_length] for i in range(0, len(message), max_length)]
 
+async def send_chunks(ctx, message: str, max_length: int = 2000):
+    """
+    Send a potentially oversized message, splitting it into chunks and
+    dispatching them concurrently with asyncio.gather instead of one await
+    per chunk.
+    """
+    chunks = split_message(message, max_length)
+    if len(chunks) == 1:
+        await ctx.send(chunks[0])
+        return
+    await asyncio.gather(*(ctx.send(chunk) for chunk in chunks))
+
+# short-lived (guild_id, identifier) -> member memo; admins often run several
+# commands against the same user back to back, and each command re-resolves
+RESOLVE_TTL = 30
+_RESOLVE_CACHE = {}
+
 async def resolve_member(ctx, identifier: str) -> discord.Member:
     """
     Resolve a guild member from an identifier (mention, user ID, or username).
@@ -26,50 +107,60 @@ async def resolve_member(ctx, identifier: str) -> discord.Member:
     In a guild channel:
       1. Try using MemberConverter (handles mentions and numeric IDs).
       2. If that fails, iterate through guild members to match on name or display_name.
-      3. If still not found, iterate over the Firestore "users" collection to find a document
-         whose "username" property matches (case-insensitive) and fetch that member by the document ID.
+      3. If still not found, resolve the document ID through the cached/indexed
+         username lookup and fetch that member by ID.
 
     In a DM (ctx.guild is None), only numeric IDs or mentions can be resolved via bot.fetch_user.
     """
     member = None
     if ctx.guild is not None:
+        identifier_lower = identifier.lower()
+        key = (ctx.guild.id, identifier_lower)
+        hit = _RESOLVE_CACHE.get(key)
+        if hit is not None and hit[1] > time.monotonic():
+            return hit[0]
         try:
             member = await commands.MemberConverter().convert(ctx, identifier)
             if member is not None:
+                _RESOLVE_CACHE[key] = (member, time.monotonic() + RESOLVE_TTL)
                 return member
         except commands.BadArgument:
             pass
-        identifier_lower = identifier.lower()
         member = discord.utils.find(
             lambda m: m.name.lower() == identifier_lower or m.display_name.lower() == identifier_lower,
             ctx.guild.members
         )
         if member is not None:
+            _RESOLVE_CACHE[key] = (member, time.monotonic() + RESOLVE_TTL)
             return member
-        def fetch_all_users():
-            db = get_db()
-            return list(db.collection("users").stream())
-        docs = await asyncio.to_thread(fetch_all_users)
-        for doc in docs:
-            data = doc.to_dict()
-            if "username" in data and data["username"].strip().lower() == identifier_lower:
-                try:
-                    member = await ctx.guild.fetch_member(int(doc.id))
-                    if member is not None:
-                        return member
-                except Exception:
-                    try:
-                        member = await ctx.bot.fetch_user(int(doc.id))
-                        if member is not None:
-                            return member
-                    except Exception:
-                        pass
+        user_id = await find_user_id_by_username(identifier_lower)
+        if user_id is not None:
+            try:
+                member = await ctx.guild.fetch_member(int(user_id))
+                if member is not None:
+                    _RESOLVE_CACHE[key] = (member, time.monotonic() + RESOLVE_TTL)
+                    return member
+            except discord.NotFound:
+                # registered but no longer in the guild; fall back to the
+                # global user endpoint below
+                pass
+            except discord.HTTPException:
+                # transient API failure: retrying via fetch_user would just
+                # repeat the same failing round-trip
+                return None
+            try:
+                member = await ctx.bot.fetch_user(int(user_id))
+                if member is not None:
+                    _RESOLVE_CACHE[key] = (member, time.monotonic() + RESOLVE_TTL)
+                    return member
+            except discord.HTTPException:
+                pass
         return None
     else:
         if identifier.isdigit():
             try:
                 member = await ctx.bot.fetch_user(int(identifier))
                 return member
-            except Exception:
+            except discord.HTTPException:
                 return None
         return None
@@ -1,30 +1,91 @@
 # utils/logging.py
 import datetime
+import functools
+import time
 import asyncio
 import discord
 from discord.utils import escape_markdown
 from utils.config import LOG_CHANNEL_ID
 
-INTERACTION_LOGS = []
+# bounded queue between command handlers (producers) and the log sender;
+# put_nowait keeps logging off the command hot path, and the bound means a
+# dead log channel can't grow memory forever
+LOG_QUEUE = asyncio.Queue(maxsize=10000)
+# stay under Discord's 2000-char message limit with room for the header
+LOG_CHUNK_MAX = 1900
+# pause between chunk sends so a burst respects the 5 msgs/5 s channel limit
+LOG_CHUNK_PAUSE = 1
+
+@functools.lru_cache(maxsize=4096)
+def _format_user_cached(name: str, mention: str) -> str:
+    return f"**{escape_markdown(name)}** ({mention})"
 
 def format_user(user: discord.User) -> str:
     """
     Return a formatted string with the user's base username (with markdown escaped)
-    and their mention if available.
+    and their mention if available. The regex-based markdown escape is memoized
+    per (name, mention), so repeat events from the same user reuse the string;
+    a rename changes the key and refreshes naturally.
     """
     try:
-        base_name = escape_markdown(user.name)
         mention = user.mention if hasattr(user, "mention") else user.name
-        return f"**{base_name}** ({mention})"
+        return _format_user_cached(user.name, mention)
     except Exception:
         return str(user)
 
+# log timestamps have second granularity, and bursts of events land in the
+# same second; format the UTC timestamp once per second instead of per event
+_LAST_SEC = 0
+_LAST_TS = ""
+
+def _timestamp():
+    global _LAST_SEC, _LAST_TS
+    sec = int(time.time())
+    if sec != _LAST_SEC:
+        _LAST_TS = datetime.datetime.fromtimestamp(
+            sec, tz=datetime.timezone.utc
+        ).isoformat()
+        _LAST_SEC = sec
+    return _LAST_TS
+
 async def log_interaction(user, command_name, details):
     """Log an interaction with a timestamp, the user, command name, and details."""
     formatted_user = format_user(user)
-    timestamp = datetime.datetime.now().isoformat()
-    log_entry = f"[{timestamp}] {formatted_user} used **{command_name}**: {details}"
-    INTERACTION_LOGS.append(log_entry)
+    log_entry = f"[{_timestamp()}] {formatted_user} used **{command_name}**: {details}"
+    if len(log_entry) > LOG_CHUNK_MAX:
+        # details interpolate unbounded user-supplied strings; an entry longer
+        # than the chunk budget would make every send of its chunk exceed
+        # Discord's 2000-char limit and fail, so cap it here
+        log_entry = log_entry[:LOG_CHUNK_MAX - 1] + "…"
+    try:
+        LOG_QUEUE.put_nowait(log_entry)
+    except asyncio.QueueFull:
+        # drop the oldest entry rather than the newest so the log stays current
+        try:
+            LOG_QUEUE.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        LOG_QUEUE.put_nowait(log_entry)
+
+def _drain_log_chunks():
+    """Drain the queue into message-sized chunks of at most LOG_CHUNK_MAX chars."""
+    chunks = []
+    current = []
+    current_len = 0
+    while True:
+        try:
+            entry = LOG_QUEUE.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if current and current_len + len(entry) + 1 > LOG_CHUNK_MAX:
+            chunks.append("\n".join(current))
+            current = []
+            current_len = 0
+        current.append(entry)
+        current_len += len(entry) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
 
 async def send_logs_periodically(bot, interval=5):
     """Periodically send accumulated logs to a designated channel."""
@@ -33,14 +94,23 @@ async def send_logs_periodically(bot, interval=5):
         print("LOG_CHANNEL_ID not set; skipping periodic log posting.")
         return
     log_channel_id = int(LOG_CHANNEL_ID)
+    no_mentions = discord.AllowedMentions.none()
+    # channel objects are stable for the lifetime of the connection; resolve
+    # once and reuse instead of a cache lookup every interval
+    channel = None
     while not bot.is_closed():
-        if INTERACTION_LOGS:
-            channel = bot.get_channel(log_channel_id)
+        if not LOG_QUEUE.empty():
+            if channel is None:
+                channel = bot.get_channel(log_channel_id)
             if channel is not None:
-                log_message = "\n".join(INTERACTION_LOGS)
-                try:
-                    await channel.send(f"**Interaction Log:**\n{log_message}")
-                except Exception as e:
-                    print("Error sending log message:", e)
-            INTERACTION_LOGS.clear()
+                for i, chunk in enumerate(_drain_log_chunks()):
+                    if i:
+                        await asyncio.sleep(LOG_CHUNK_PAUSE)
+                    try:
+                        await channel.send(
+                            f"**Interaction Log:**\n{chunk}",
+                            allowed_mentions=no_mentions,
+                        )
+                    except discord.HTTPException as e:
+                        print("Error sending log message:", e)
         await asyncio.sleep(interval)